@@ -3,25 +3,167 @@ import os
 import json
 import socket
 import subprocess
+import tempfile
+import time
+import queue
+import threading
+from array import array
 from datetime import datetime
+from functools import lru_cache
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton,
-    QProgressBar, QTextEdit, QFileDialog, QMessageBox, QListWidget, QListWidgetItem, QSpinBox, QSystemTrayIcon, QCheckBox
+    QProgressBar, QPlainTextEdit, QFileDialog, QMessageBox, QListView, QSpinBox, QSystemTrayIcon,
+    QStyledItemDelegate, QStyle, QStyleOptionButton, QStyleOptionProgressBar, QStyleOptionViewItem
+)
+from PyQt5.QtGui import QFont, QIcon, QColor, QTextCharFormat, QTextCursor
+from PyQt5.QtCore import (
+    Qt, pyqtSignal, QObject, QRunnable, QThreadPool, QTimer, pyqtSlot,
+    QAbstractListModel, QSortFilterProxyModel, QModelIndex, QRect, QSize, QEvent
 )
-from PyQt5.QtGui import QFont, QIcon, QColor    
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QRunnable, QThreadPool, pyqtSlot
 
 import yt_dlp
 from yt_dlp.utils import DownloadError, ExtractorError, GeoRestrictedError, UnsupportedError
 from yt_dlp import YoutubeDL
-from yt_dlp_gemini_tagger import GeminiID3PostProcessor
+from yt_dlp.cookies import extract_cookies_from_browser
+from yt_dlp_gemini_tagger import GeminiID3PostProcessor, wait_for_pending as wait_for_pending_tags
+
+# History records as UTF-8 bytes (no newline; writers append NL); orjson is an optional, much faster encoder
+NL = b"\n"
+try:
+    import orjson
+
+    def _dumps(record):
+        return orjson.dumps(record)
+except ImportError:
+    def _dumps(record):
+        return json.dumps(record, ensure_ascii=False).encode("utf-8")
 
 ffmpeg_dir = os.path.join(os.path.dirname(__file__), "..", "ffmpeg")
 ydl_opts = {
     "ffmpeg_location": ffmpeg_dir,
     "outtmpl": "%(title).200s.%(ext)s"
 }
+
+# -----------------------------
+# yt-dlp option templates (copied per batch, never mutated)
+# -----------------------------
+FORMAT_MAP = {
+    "Best_Video+Audio": "bestvideo+bestaudio/best",
+    "1080p": "bestvideo[height=1080]+bestaudio/best",
+    "720p": "bestvideo[height=720]+bestaudio/best",
+    "480p": "bestvideo[height=480]+bestaudio/best",
+    "only_mp3": "bestaudio"
+}
+
+# SABR-safe fallback format for qualities missing from FORMAT_MAP
+SABR_SAFE_FORMAT = "bv*[protocol^=http]+ba*[protocol^=http]/best"
+
+BASE_YDL_OPTS = {
+    'outtmpl': '%(title).200s.%(ext)s',
+    'windowsfilenames': True,
+    'restrictfilenames': True,
+    'socket_timeout': 30,
+    'ignoreerrors': True,
+    'noprogress': True,
+    'continuedl': True,        # resume partial downloads
+    'updatetime': False,
+    'postprocessor_args': [],
+    # multi-connection fetch within one video: parallel DASH/HLS fragments,
+    # and 10 MiB HTTP Range chunks for progressive streams (finer resume)
+    'http_chunk_size': 10 * 1024 * 1024,
+    'retries': 3,
+    'fragment_retries': 3,
+}
+
+MP3_POSTPROCS = [
+    {
+        'key': 'FFmpegExtractAudio',
+        'preferredcodec': 'mp3',
+        'preferredquality': '192'
+    },
+    {'key': 'FFmpegMetadata'},
+    {'key': 'EmbedThumbnail'},
+    # GeminiID3PostProcessor is added per YoutubeDL in DownloadWorker.get_ydl
+]
+
+# Longest the window waits on close for background MP3 tagging to finish, seconds
+TAG_FLUSH_TIMEOUT = 30
+
+# Warm YoutubeDL instances, one set per pool thread (see DownloadWorker.get_ydl)
+_tls = threading.local()
+
+
+class HookSlot:
+    """
+    Progress hook installed once per cached YoutubeDL; forwards to the hook of the
+    worker using that instance now. Bound to the YoutubeDL rather than the calling
+    thread: with concurrent fragments, yt-dlp runs hooks on its own executor threads.
+    """
+    __slots__ = ("hook",)
+
+    def __init__(self):
+        self.hook = None
+
+    def __call__(self, d):
+        hook = self.hook
+        if hook:
+            hook(d)
+
+# -----------------------------
+# Browser cookies (decrypted once per Chrome cookie-DB revision)
+# -----------------------------
+_cookie_files = []      # every temp cookies.txt written, removed on exit
+
+
+def chrome_cookie_db_path():
+    """
+    Best-effort location of Chrome's default-profile cookie DB; None if not found.
+    """
+    if sys.platform.startswith("win"):
+        base = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Google", "Chrome", "User Data", "Default")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support/Google/Chrome/Default")
+    else:
+        base = os.path.expanduser("~/.config/google-chrome/Default")
+    for candidate in (os.path.join(base, "Network", "Cookies"), os.path.join(base, "Cookies")):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=4)
+def _chrome_cookie_file(mtime_key):
+    jar = extract_cookies_from_browser("chrome")
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".txt")
+    tmp.close()
+    _cookie_files.append(tmp.name)
+    jar.save(tmp.name, ignore_discard=True, ignore_expires=True)
+    return tmp.name
+
+
+def chrome_cookie_file():
+    """
+    Path of a Netscape cookies.txt for Chrome; re-extracted only when the cookie DB changes.
+    """
+    db = chrome_cookie_db_path()
+    path = _chrome_cookie_file(os.path.getmtime(db) if db else 0.0)
+    if not os.path.exists(path):
+        _chrome_cookie_file.cache_clear()
+        path = _chrome_cookie_file(os.path.getmtime(db) if db else 0.0)
+    return path
+
+
+def remove_cookie_files():
+    for path in _cookie_files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _cookie_files.clear()
+    _chrome_cookie_file.cache_clear()
+
+
 # -----------------------------
 # Signals
 # -----------------------------
@@ -34,106 +176,236 @@ class SignalHandler(QObject):
     finished_one = pyqtSignal(str, str)
     # history event
     history_event = pyqtSignal(dict)
+    # yt-dlp self-update finished, success
+    ytdlp_updated = pyqtSignal(bool)
+    # fetch generation, info summary text
+    fetch_summary = pyqtSignal(int, str)
+    # fetch generation, batch of playlist entries
+    entries_batch = pyqtSignal(int, list)
+    # fetch generation, exported Chrome cookies.txt ("" if unavailable)
+    cookies_ready = pyqtSignal(int, str)
+    # fetch generation, dialog title, dialog message
+    fetch_failed = pyqtSignal(int, str, str)
+    # fetch generation (all entries delivered)
+    fetch_done = pyqtSignal(int)
 
 
 # -----------------------------
-# Worker (one URL per worker)
+# History writer (single background consumer)
+# -----------------------------
+class HistoryWriter:
+    """
+    Owns the append-only history handle on a daemon thread; the GUI only enqueues.
+    Records that arrive together are joined into one write() on a BufferedWriter.
+    """
+    MAX_BATCH = 64
+
+    def __init__(self, signals):
+        self.signals = signals
+        self._q = queue.SimpleQueue()
+        self._fp = None
+        self._thread = threading.Thread(target=self._loop, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def open(self, path):
+        self._q.put(("open", path))
+
+    def put(self, record):
+        self._q.put(("record", record))
+
+    def flush(self):
+        self._q.put(("flush", None))
+
+    def close(self):
+        self._q.put(("stop", None))
+        self._thread.join(timeout=2)
+
+    def _loop(self):
+        pending = None
+        while True:
+            op, arg = pending or self._q.get()
+            pending = None
+            try:
+                if op == "record":
+                    # payload/NL pairs go into one join: no per-line str or bytes concatenation
+                    buf = [_dumps(arg), NL]
+                    # drain whatever else is already queued, up to MAX_BATCH
+                    while len(buf) < 2 * self.MAX_BATCH and not self._q.empty():
+                        item = self._q.get_nowait()
+                        if item[0] != "record":
+                            pending = item      # control op runs after this batch
+                            break
+                        buf += (_dumps(item[1]), NL)
+                    if self._fp:
+                        self._fp.write(b"".join(buf))
+                elif op == "open":
+                    self._close_fp()
+                    self._fp = open(arg, "ab", buffering=65536)
+                elif op == "flush":
+                    if self._fp:
+                        self._fp.flush()
+                elif op == "stop":
+                    self._close_fp()
+                    return
+            except Exception as e:
+                # non-fatal
+                self.signals.update_status.emit(f"History write failed: {e}", "warning")
+
+    def _close_fp(self):
+        if self._fp:
+            try:
+                self._fp.close()
+            finally:
+                self._fp = None
+
+
+# -----------------------------
+# Worker (one batch of URLs per worker)
 # -----------------------------
 class DownloadWorker(QRunnable):
-    def __init__(self, url, key, folder, quality, tmpl, signals, flags):
+    def __init__(self, pairs, templates, folder, quality, signals, pause_evt, cancel_evt, cookie_path=None, connections=5):
         """
-        flags: dict with keys:
-            cancel (bool), pause (bool)
+        pairs: list of (key, url) handled sequentially by this worker
+        templates: dict key -> output template (already zindex-prefixed)
+        cookie_path: Netscape cookies.txt exported once by the app (optional)
+        connections: parallel fragment/range connections per video
+        pause_evt, cancel_evt: threading.Event shared with the app (set = pause/cancel requested)
         """
         super().__init__()
-        self.url = url
-        self.key = key
+        self.pairs = pairs
+        self.templates = templates
         self.folder = folder
         self.quality = quality
-        self.tmpl = tmpl
         self.signals = signals
-        self.flags = flags
+        self.pause_evt = pause_evt
+        self.cancel_evt = cancel_evt
+        self.cookie_path = cookie_path
+        self.connections = connections
+        self._current_key = None
+        # progress throttle state (reset per video)
+        self._last_pct = -1
+        self._last_emit = 0.0
+        self._total = 0             # first known total size, bytes
+        self._next_bytes = 0        # skip hook ticks until downloaded reaches this
 
     @pyqtSlot()
     def run(self):
-        self.process_download_one(self.url, self.key, self.folder, self.quality, self.tmpl, self.flags)
-
-    # ---- yt-dlp per-video execution ----
-    def process_download_one(self, url, key, folder, quality, tmpl, flags):
-        format_map = {
-            "Best_Video+Audio": "bestvideo+bestaudio/best",
-            "1080p": "bestvideo[height=1080]+bestaudio/best",
-            "720p": "bestvideo[height=720]+bestaudio/best",
-            "480p": "bestvideo[height=480]+bestaudio/best",
-            "only_mp3": "bestaudio"
-        }
+        self.process_download_batch(self.pairs, self.folder, self.quality)
+
+    # ---- yt-dlp batch execution (one warm YoutubeDL per pool thread) ----
+    def process_download_batch(self, pairs, folder, quality):
+        pause_evt, cancel_evt = self.pause_evt, self.cancel_evt
 
-        # Hook bound to this specific key
+        # Hook reads the key of the video currently being processed
         def hook(d):
             # pause support (soft pause: abort current request; resume will re-run with continuedl)
-            if flags.get("pause", False) or flags.get("cancel", False):
+            if pause_evt.is_set() or cancel_evt.is_set():
                 raise Exception("Paused/Cancelled")
 
+            key = self._current_key
             if d['status'] == 'downloading':
-                total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
                 downloaded = d.get('downloaded_bytes', 0)
+                # cheap early-out: nothing to report until another ~1% has arrived
+                if downloaded < self._next_bytes:
+                    return
+                total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
                 if total > 0:
+                    if not self._total:
+                        self._total = total
                     percent = int(downloaded / total * 100)
-                    self.signals.update_progress.emit(percent, key)
+                    # at most ~10 cross-thread updates/sec, and only on change
+                    now = time.monotonic()
+                    if percent != self._last_pct and now - self._last_emit > 0.1:
+                        self.signals.update_progress.emit(percent, key)
+                        self._last_pct = percent
+                        self._last_emit = now
+                        self._next_bytes = downloaded + max(1, self._total // 100)
             elif d['status'] == 'finished':
                 filename = d.get('filename', '') or ''
                 # Report 100% for cosmetic closure
                 self.signals.update_progress.emit(100, key)
                 self.signals.finished_one.emit(key, filename)
+                # "bestvideo+bestaudio" downloads a second file under the same key;
+                # restart the throttle so its ticks are reported from 0%
+                self._last_pct = -1
+                self._total = 0
+                self._next_bytes = 0
+
+        # shallow copy of the shared template; only per-job fields are set here
+        ydl_opts = BASE_YDL_OPTS.copy()
+        ydl_opts.update(
+            format=FORMAT_MAP.get(quality, SABR_SAFE_FORMAT),
+            paths={'home': folder},
+            writethumbnail=quality == "only_mp3",
+            concurrent_fragment_downloads=self.connections,
+        )
 
-        outtmpl = tmpl.strip() if tmpl.strip() else '%(title).200s.%(ext)s'
-
-        # SABR-safe fallback format
-        sabr_safe_format = "bv*[protocol^=http]+ba*[protocol^=http]/best"
-
-        # Use your format_map if present, otherwise fallback to SABR-safe
-        selected_format = format_map.get(quality, sabr_safe_format)
-
-        ydl_opts = {
-            'format': selected_format,
-            'paths': {'home': folder},
-            'outtmpl': outtmpl,
-            'windowsfilenames': True,
-            'restrictfilenames': True,
-            'progress_hooks': [hook],
-            'socket_timeout': 30,
-            'ignoreerrors': True,
-            'noprogress': True,
-            'continuedl': True,        # resume partial downloads
-            'updatetime': False,
-            'writethumbnail': quality == "only_mp3",
-            'postprocessor_args': [],
-            'cookies_from_browser': ('chrome',),
-        }
-
+        # cookies were exported once at fetch time; no per-worker browser DB decrypt
+        if self.cookie_path:
+            ydl_opts['cookiefile'] = self.cookie_path
 
         # MP3 post-processing with metadata + thumbnail embedding
         if quality == "only_mp3":
-            ydl_opts['postprocessors'] = [
-                {
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192'
-                },
-                {'key': 'FFmpegMetadata'},
-                {'key': 'EmbedThumbnail'},
-                # GeminiID3PostProcessor()
-            ]
+            ydl_opts['postprocessors'] = MP3_POSTPROCS
+
+        ydl, slot = self.get_ydl(quality, ydl_opts)
+        slot.hook = hook
+        try:
+            for key, url in pairs:
+                # stop picking up new items once paused/cancelled; resume re-issues the rest
+                if pause_evt.is_set() or cancel_evt.is_set():
+                    break
+                self.process_download_one(ydl, url, key, folder, quality)
+        finally:
+            slot.hook = None
+        # background Gemini tagging is not awaited here: it must not hold a download slot.
+        # closeEvent waits (bounded) for whatever is still pending.
+
+    def get_ydl(self, quality, ydl_opts):
+        """
+        Reuse this pool thread's YoutubeDL for the same quality/cookies; only per-job params are swapped.
+        Format selector and postprocessors are fixed at construction, hence part of the cache key.
+        Returns (ydl, its HookSlot).
+        """
+        cache = getattr(_tls, "ydls", None)
+        if cache is None:
+            cache = _tls.ydls = {}
+        cache_key = (quality, self.cookie_path)
+        entry = cache.get(cache_key)
+        if entry is None:
+            # a new cookies.txt supersedes the old one; drop instances still holding it
+            for stale in [k for k in cache if k[1] != self.cookie_path]:
+                cache.pop(stale)[0].close()
+            ydl = yt_dlp.YoutubeDL(ydl_opts)
+            slot = HookSlot()
+            ydl.add_progress_hook(slot)
+            if quality == "only_mp3":
+                # after_move: tagging runs in the background, so it must see the final path
+                ydl.add_post_processor(GeminiID3PostProcessor(ydl), when='after_move')
+            entry = cache[cache_key] = (ydl, slot)
+        else:
+            ydl = entry[0]
+            ydl.params['paths'] = ydl_opts['paths']
+            ydl.params['concurrent_fragment_downloads'] = ydl_opts['concurrent_fragment_downloads']
+        return entry
+
+    # ---- yt-dlp per-video execution (reuses the worker's YoutubeDL) ----
+    def process_download_one(self, ydl, url, key, folder, quality):
+        tmpl = self.templates.get(key, "")
+        outtmpl = tmpl.strip() if tmpl.strip() else '%(title).200s.%(ext)s'
+        ydl.params['outtmpl'] = {'default': outtmpl}
+        self._current_key = key
+        self._last_pct = -1
+        self._last_emit = 0.0
+        self._total = 0
+        self._next_bytes = 0
 
         start_ts = datetime.now().isoformat()
         ok = False
         err_msg = None
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                if quality == "only_mp3":
-                    ydl.add_post_processor(GeminiID3PostProcessor(ydl))
-                ydl.download([url])
+            ydl.download([url])
             ok = True
         except GeoRestrictedError:
             err_msg = "Geo-restricted; skipped."
@@ -149,10 +421,10 @@ class DownloadWorker(QRunnable):
             self.signals.update_status.emit(f"❌ {err_msg}", "error")
         except Exception as e:
             # Determine whether this was a pause/cancel or actual error
-            if flags.get("pause", False):
+            if self.pause_evt.is_set():
                 err_msg = "Paused."
                 self.signals.update_status.emit("⏸️ Download paused.", "warning")
-            elif flags.get("cancel", False):
+            elif self.cancel_evt.is_set():
                 err_msg = "Cancelled."
                 self.signals.update_status.emit("⏹️ Download cancelled.", "warning")
             else:
@@ -172,6 +444,366 @@ class DownloadWorker(QRunnable):
         })
 
 
+# -----------------------------
+# Worker (info extraction, streamed in batches)
+# -----------------------------
+class FetchWorker(QRunnable):
+    BATCH_SIZE = 25
+
+    def __init__(self, url, gen, signals):
+        """
+        gen: fetch generation; the GUI ignores signals from superseded fetches
+        """
+        super().__init__()
+        self.url = url
+        self.gen = gen
+        self.cookie_path = None
+        self.signals = signals
+        self.stopped = False    # set by the GUI when a newer fetch starts
+
+    @pyqtSlot()
+    def run(self):
+        gen = self.gen
+        self.cookie_path = self.export_browser_cookies()
+        self.signals.cookies_ready.emit(gen, self.cookie_path or "")
+
+        ydl_opts = {
+            'extract_flat': True,
+            'quiet': True,
+        }
+        if self.cookie_path:
+            ydl_opts['cookiefile'] = self.cookie_path
+
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = self.resolve(ydl, self.url)
+                if not info:
+                    self.signals.fetch_failed.emit(gen, "Error", "Unable to fetch info. The URL may be empty or unavailable.")
+                    return
+
+                if "entries" in info:
+                    if not self.stream_entries(info):
+                        return
+                else:
+                    # single video
+                    summary = f"Type: Single Video\nTitle: {info.get('title','N/A')}\nUploader: {info.get('uploader','N/A')}"
+                    self.signals.fetch_summary.emit(gen, summary)
+                    self.signals.entries_batch.emit(gen, [info])
+                self.signals.fetch_done.emit(gen)
+
+        except GeoRestrictedError:
+            self.signals.fetch_failed.emit(gen, "Geo-Restricted", "This content is not available in your region.")
+            self.signals.update_status.emit("Error: Geo-restricted content.", "error")
+        except ExtractorError as e:
+            self.signals.fetch_failed.emit(gen, "Extractor Error", f"Could not extract info: {e}")
+            self.signals.update_status.emit(f"Extractor error: {e}", "error")
+        except UnsupportedError:
+            self.signals.fetch_failed.emit(gen, "Unsupported URL", "Unsupported link. Provide a valid YouTube URL.")
+            self.signals.update_status.emit("Unsupported URL.", "error")
+        except socket.timeout:
+            self.signals.fetch_failed.emit(gen, "Network Timeout", "Request to YouTube timed out. Check your connection.")
+            self.signals.update_status.emit("Network timeout.", "error")
+        except DownloadError as e:
+            self.signals.fetch_failed.emit(gen, "Download Error", f"yt-dlp failed to fetch info: {e}")
+            self.signals.update_status.emit(f"Download error: {e}", "error")
+        except Exception as e:
+            self.signals.fetch_failed.emit(gen, "Unknown Error", f"An unexpected error occurred: {str(e)}")
+            self.signals.update_status.emit(f"Unexpected error: {str(e)}", "error")
+
+    def export_browser_cookies(self):
+        """
+        Cached Chrome cookies.txt shared with the download workers; None if unavailable.
+        Runs here, off the GUI thread: a changed cookie DB means a copy plus a decrypt
+        (DPAPI / keyring, which may prompt).
+        """
+        try:
+            return chrome_cookie_file()
+        except Exception as e:
+            # non-fatal: run without browser cookies
+            self.signals.update_status.emit(f"Browser cookies unavailable: {e}", "warning")
+            return None
+
+    def resolve(self, ydl, url):
+        """
+        Extract without processing so playlist entries stay a lazy generator;
+        follow url-type redirects (e.g. watch?v=…&list=… -> playlist) by hand.
+        """
+        info = ydl.extract_info(url, download=False, process=False)
+        for _ in range(5):
+            if not info or info.get("_type") not in ("url", "url_transparent"):
+                break
+            info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+        return info
+
+    def stream_entries(self, info):
+        """
+        Emit playlist entries every BATCH_SIZE items as pages arrive. False if superseded.
+        """
+        title = info.get('title', 'N/A')
+        uploader = info.get('uploader', 'N/A')
+        count = info.get('playlist_count')
+        summary = "Type: Playlist\nTitle: {}\nVideos: {}\nUploader: {}"
+        self.signals.fetch_summary.emit(self.gen, summary.format(title, count if count is not None else "…", uploader))
+
+        entries = info.get("entries") or []
+        if hasattr(entries, "getslice"):
+            # PagedList-style results are not plain iterables
+            entries = entries.getslice()
+
+        batch, total = [], 0
+        for entry in entries:
+            if self.stopped:
+                return False
+            if not entry:
+                continue
+            batch.append(entry)
+            if len(batch) >= self.BATCH_SIZE:
+                self.signals.entries_batch.emit(self.gen, batch)
+                total += len(batch)
+                batch = []
+        if self.stopped:
+            return False
+        if batch:
+            self.signals.entries_batch.emit(self.gen, batch)
+            total += len(batch)
+
+        if count is None:
+            self.signals.fetch_summary.emit(self.gen, summary.format(title, total, uploader))
+        return True
+
+
+# -----------------------------
+# Worker (pip self-update of yt-dlp, off the GUI thread)
+# -----------------------------
+class PipUpdateWorker(QRunnable):
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "pip", "install", "-U", "yt-dlp"],
+                capture_output=True, text=True
+            )
+        except OSError as e:
+            self.signals.update_status.emit(f"yt-dlp update failed: {e}", "error")
+            self.signals.ytdlp_updated.emit(False)
+            return
+        if proc.returncode == 0:
+            self.signals.update_status.emit("yt-dlp updated successfully. Please restart the app to use the new version.", "success")
+            self.signals.ytdlp_updated.emit(True)
+        else:
+            detail = (proc.stderr or proc.stdout or "").strip().splitlines()
+            reason = detail[-1] if detail else f"pip exited with code {proc.returncode}"
+            self.signals.update_status.emit(f"yt-dlp update failed: {reason}", "error")
+            self.signals.ytdlp_updated.emit(False)
+
+
+# -----------------------------
+# Playlist model (SoA rows) + row delegate
+# -----------------------------
+class PlaylistModel(QAbstractListModel):
+    TitleRole = Qt.UserRole + 1
+    CheckRole = Qt.UserRole + 2
+    ProgressRole = Qt.UserRole + 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._keys = []             # row -> key
+        self._titles = []           # row -> display title
+        self._titles_lower = []     # row -> lowercased title, for filtering
+        self._checked = array('b')  # row -> 0/1
+        self._checked_count = 0     # number of 1s in _checked
+        self._progress = array('B') # row -> 0..100
+        self._rows = {}             # key -> row
+
+    def set_rows(self, keys, titles):
+        self.beginResetModel()
+        self._keys = list(keys)
+        self._titles = list(titles)
+        self._titles_lower = [t.lower() for t in self._titles]
+        self._checked = array('b', [1]) * len(self._keys)
+        self._checked_count = len(self._keys)
+        self._progress = array('B', [0]) * len(self._keys)
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self.endResetModel()
+
+    def append_rows(self, keys, titles):
+        if not keys:
+            return
+        first = len(self._keys)
+        self.beginInsertRows(QModelIndex(), first, first + len(keys) - 1)
+        self._keys.extend(keys)
+        self._titles.extend(titles)
+        self._titles_lower.extend(t.lower() for t in titles)
+        self._checked.extend(array('b', [1]) * len(keys))
+        self._checked_count += len(keys)
+        self._progress.extend(array('B', [0]) * len(keys))
+        for row, key in enumerate(keys, start=first):
+            self._rows[key] = row
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.DisplayRole, self.TitleRole):
+            return self._titles[row]
+        if role == self.CheckRole:
+            return bool(self._checked[row])
+        if role == self.ProgressRole:
+            return self._progress[row]
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        row = index.row()
+        if role == self.CheckRole:
+            new = 1 if value else 0
+            self._checked_count += new - self._checked[row]
+            self._checked[row] = new
+        elif role == self.ProgressRole:
+            self._progress[row] = max(0, min(100, int(value)))
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ---- column views (read-only, row-aligned) ----
+    def keys(self):
+        return self._keys
+
+    def checked(self):
+        return self._checked
+
+    def progress(self):
+        return self._progress
+
+    def title_lower(self, row):
+        """Lowercased title of row (precomputed once), for filtering."""
+        return self._titles_lower[row]
+
+    # ---- key-based helpers ----
+    def row_for_key(self, key):
+        return self._rows.get(key)
+
+    def set_progress(self, key, percent):
+        row = self._rows.get(key)
+        if row is None:
+            return False
+        return self.setData(self.index(row), percent, self.ProgressRole)
+
+    def all_checked(self):
+        return self._checked_count == len(self._checked)
+
+    def set_all_checked(self, state):
+        """
+        One-pass bulk toggle with a single dataChanged over all rows.
+        """
+        n = len(self._keys)
+        if not n:
+            return
+        self._checked[:] = array('b', [1 if state else 0]) * n
+        self._checked_count = n if state else 0
+        self.dataChanged.emit(self.index(0), self.index(len(self._keys) - 1), [self.CheckRole])
+
+
+class PlaylistFilterProxy(QSortFilterProxyModel):
+    """
+    Substring filter over the source model's precomputed lowercase titles.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pattern = ""
+
+    def set_pattern(self, text):
+        pattern = text.lower().strip()
+        if pattern != self._pattern:
+            self._pattern = pattern
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self._pattern or self._pattern in self.sourceModel().title_lower(source_row)
+
+
+class RowDelegate(QStyledItemDelegate):
+    """
+    Paints [checkbox title] [progressbar] for a row over the usual item background
+    (selection/hover); clicking the checkbox or pressing Space toggles it.
+    """
+    BAR_STRETCH = 2 / 7     # same 5:2 split as the old per-row widgets
+
+    def _rects(self, rect):
+        inner = rect.adjusted(6, 4, -6, -4)
+        bar_w = int(inner.width() * self.BAR_STRETCH)
+        check_rect = QRect(inner.left(), inner.top(), inner.width() - bar_w - 6, inner.height())
+        bar_rect = QRect(inner.right() - bar_w + 1, inner.top(), bar_w, inner.height())
+        return check_rect, bar_rect
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        check_rect, bar_rect = self._rects(option.rect)
+
+        # item background first, so selection and hover stay visible
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, widget)
+
+        cb = QStyleOptionButton()
+        cb.rect = check_rect
+        cb.text = index.data(PlaylistModel.TitleRole)
+        cb.palette = option.palette
+        cb.fontMetrics = option.fontMetrics
+        checked = index.data(PlaylistModel.CheckRole)
+        cb.state = (option.state & (QStyle.State_Enabled | QStyle.State_MouseOver | QStyle.State_HasFocus)) | (
+            QStyle.State_On if checked else QStyle.State_Off
+        )
+        style.drawControl(QStyle.CE_CheckBox, cb, painter, widget)
+
+        pct = index.data(PlaylistModel.ProgressRole)
+        pb = QStyleOptionProgressBar()
+        pb.rect = bar_rect
+        pb.palette = option.palette
+        pb.fontMetrics = option.fontMetrics
+        pb.state = QStyle.State_Enabled | QStyle.State_Horizontal
+        pb.minimum = 0
+        pb.maximum = 100
+        pb.progress = pct
+        pb.text = f"{pct}%"
+        pb.textVisible = True
+        pb.textAlignment = Qt.AlignCenter
+        style.drawControl(QStyle.CE_ProgressBar, pb, painter, widget)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), option.fontMetrics.height() + 16)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            check_rect, _ = self._rects(option.rect)
+            if check_rect.contains(event.pos()):
+                return self.toggle(model, index)
+        elif event.type() == QEvent.KeyPress and event.key() in (Qt.Key_Space, Qt.Key_Select):
+            # the view forwards Space/Select on the current row here before selecting
+            return self.toggle(model, index)
+        return super().editorEvent(event, model, option, index)
+
+    @staticmethod
+    def toggle(model, index):
+        return model.setData(index, not index.data(PlaylistModel.CheckRole), PlaylistModel.CheckRole)
+
+
 # -----------------------------
 # Main Window
 # -----------------------------
@@ -182,15 +814,46 @@ class YouTubeDownloaderApp(QMainWindow):
         QApplication.setFont(QFont("Arial", 14))
         self.signals = SignalHandler()
         self.playlist_items = []    # entries with at least {title, url/id}
-        self.threadpool = QThreadPool()
-        self.flags = {"cancel": False, "pause": False}
-        self.item_widgets = {}      # key -> {"item": QListWidgetItem, "bar": QProgressBar, "label": QLabel}
+        self._urls = []             # row -> normalized download URL (entry['_full_url'])
+        # downloads get their own pool so fetch/update never queue behind them
+        self._dl_pool = QThreadPool()
+        self._dl_pool.setExpiryTimeout(-1)      # keep pool threads (and their YoutubeDL) warm
+        self._aux_pool = QThreadPool()          # FetchWorker / PipUpdateWorker
+        self._aux_pool.setMaxThreadCount(2)
+        self.pause_evt = threading.Event()
+        self.cancel_evt = threading.Event()
+        self.model = PlaylistModel(self)    # row i <-> self.playlist_items[i]
+        self.proxy = PlaylistFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
         self.tray = None            # QSystemTrayIcon
         self.history_path = None    # set when folder chosen
+        self._fetch_gen = 0         # bumped per fetch; stale batches are dropped
+        self._fetch_worker = None
+        self._history = HistoryWriter(self.signals)    # background append-only writer
+        self._cookie_path = None    # temp cookies.txt exported from Chrome (cached)
+
+        # status log: lines are buffered and drained on a timer
+        self._log_buf = []          # (level, line)
+        self._log_formats = {}
+        for level, color in (("error", "red"), ("success", "green"), ("warning", "yellow"), ("info", "white")):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self._log_formats[level] = fmt
 
         self.init_ui()
         self.connect_signals()
 
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(100)
+        self._log_timer.timeout.connect(self.drain_status)
+        self._log_timer.start()
+
+        # history writes are buffered; push them to disk periodically
+        self._history_timer = QTimer(self)
+        self._history_timer.setInterval(2000)
+        self._history_timer.timeout.connect(self.flush_history)
+        self._history_timer.start()
+
     # ---------- UI ----------
     def init_ui(self):
         self.setWindowTitle("YT Playlist Downloader")
@@ -223,10 +886,10 @@ class YouTubeDownloaderApp(QMainWindow):
         fetch_button.clicked.connect(self.fetch_info)
         url_row.addWidget(fetch_button)
 
-        update_button = QPushButton("Update yt-dlp")
-        update_button.setStyleSheet("background-color: #434C5E; color: #D8DEE9; padding: 8px; border-radius: 5px;")
-        update_button.clicked.connect(self.update_ytdlp)
-        url_row.addWidget(update_button)
+        self.update_button = QPushButton("Update yt-dlp")
+        self.update_button.setStyleSheet("background-color: #434C5E; color: #D8DEE9; padding: 8px; border-radius: 5px;")
+        self.update_button.clicked.connect(self.update_ytdlp)
+        url_row.addWidget(self.update_button)
 
         root.addLayout(url_row)
 
@@ -247,8 +910,11 @@ class YouTubeDownloaderApp(QMainWindow):
         root.addLayout(filter_row)
 
         # Video list with per-item progressbars
-        self.video_list = QListWidget()
+        self.video_list = QListView()
         self.video_list.setStyleSheet("font: 22px; background-color: #3B4252; color: #ECEFF4; padding: 1px; border-radius: 1px;")
+        self.video_list.setModel(self.proxy)
+        self.video_list.setItemDelegate(RowDelegate(self.video_list))
+        self.video_list.setUniformItemSizes(True)
         root.addWidget(self.video_list)
 
         # Select all / none
@@ -262,11 +928,21 @@ class YouTubeDownloaderApp(QMainWindow):
         conc_label = QLabel("Parallel downloads:")
         self.conc_spin = QSpinBox()
         self.conc_spin.setRange(1, 8)
-        self.conc_spin.setValue(min(4, self.threadpool.maxThreadCount()))
+        self.conc_spin.setValue(min(4, self._dl_pool.maxThreadCount()))
+        self._dl_pool.setMaxThreadCount(self.conc_spin.value())
+        self.conc_spin.valueChanged.connect(self._dl_pool.setMaxThreadCount)
         self.conc_spin.setStyleSheet("background-color: #4C566A; color: #D8DEE9; padding: 6px; border-radius: 5px;")
         select_row.addWidget(conc_label)
         select_row.addWidget(self.conc_spin)
 
+        frag_label = QLabel("Connections per video:")
+        self.frag_spin = QSpinBox()
+        self.frag_spin.setRange(1, 16)
+        self.frag_spin.setValue(5)
+        self.frag_spin.setStyleSheet("background-color: #4C566A; color: #D8DEE9; padding: 6px; border-radius: 5px;")
+        select_row.addWidget(frag_label)
+        select_row.addWidget(self.frag_spin)
+
         root.addLayout(select_row)
 
         # Quality + Folder selection in one row
@@ -306,8 +982,9 @@ class YouTubeDownloaderApp(QMainWindow):
         root.addWidget(self.progress_bar)
 
         # Status log (timestamped + colored)
-        self.status_text = QTextEdit()
+        self.status_text = QPlainTextEdit()
         self.status_text.setReadOnly(True)
+        self.status_text.setMaximumBlockCount(2000)     # oldest lines are dropped
         self.status_text.setFont(QFont("Courier New", 11))
         self.status_text.setStyleSheet("background-color: #2E3440; color: #D8DEE9; padding: 8px; border-radius: 5px;")
         self.status_text.setMinimumHeight(130) 
@@ -357,28 +1034,39 @@ class YouTubeDownloaderApp(QMainWindow):
         self.signals.update_progress.connect(self.set_item_progress)
         self.signals.finished_one.connect(self.one_finished)
         self.signals.history_event.connect(self.append_history)
+        self.signals.ytdlp_updated.connect(self.ytdlp_update_done)
+        self.signals.fetch_summary.connect(self.on_fetch_summary)
+        self.signals.entries_batch.connect(self.on_entries_batch)
+        self.signals.cookies_ready.connect(self.on_cookies_ready)
+        self.signals.fetch_failed.connect(self.on_fetch_failed)
+        self.signals.fetch_done.connect(self.on_fetch_done)
 
     def append_status(self, text, level="info"):
+        # buffered; drain_status renders pending lines every 100 ms
         ts = datetime.now().strftime("[%H:%M:%S] ")
-        # Colorize
-        if level == "error":
-            self.status_text.setTextColor(QColor("red"))
-        elif level == "success":
-            self.status_text.setTextColor(QColor("green"))
-        elif level == "warning":
-            self.status_text.setTextColor(QColor("yellow"))
-        else:
-            self.status_text.setTextColor(QColor("white"))
-        self.status_text.append(ts + text)
+        self._log_buf.append((level, ts + text))
+
+    def drain_status(self):
+        if not self._log_buf:
+            return
+        doc = self.status_text.document()
+        cursor = QTextCursor(doc)
+        cursor.movePosition(QTextCursor.End)
+        # one edit block -> one relayout for the whole batch
+        cursor.beginEditBlock()
+        for level, line in self._log_buf:
+            if not doc.isEmpty():
+                cursor.insertBlock()
+            cursor.insertText(line, self._log_formats.get(level, self._log_formats["info"]))
+        cursor.endEditBlock()
+        self._log_buf.clear()
         self.status_text.verticalScrollBar().setValue(self.status_text.verticalScrollBar().maximum())
 
     def set_item_progress(self, percent, key):
-        w = self.item_widgets.get(key)
-        if not w:
+        # dataChanged is emitted for this row only
+        if not self.model.set_progress(key, percent):
             # fallback to global progress if unknown
             self.progress_bar.setValue(percent)
-            return
-        w["bar"].setValue(percent)
 
     def one_finished(self, key, filename):
         self.append_status(f"Finished: {os.path.basename(filename)}", "success")
@@ -386,14 +1074,25 @@ class YouTubeDownloaderApp(QMainWindow):
             self.tray.showMessage("Download finished", os.path.basename(filename), QSystemTrayIcon.Information, 3000)
 
     def append_history(self, record: dict):
-        try:
-            if not self.history_path:
-                return
-            with open(self.history_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
-        except Exception as e:
-            # non-fatal
-            self.append_status(f"History write failed: {e}", "warning")
+        # non-blocking; serialization and I/O happen on the writer thread
+        if self.history_path:
+            self._history.put(record)
+
+    def open_history(self, folder):
+        """
+        Point the history writer at this folder's log (one persistent handle per folder).
+        """
+        path = os.path.join(folder, "download_history.jsonl")
+        if self.history_path == path:
+            return
+        self.history_path = path
+        self._history.open(path)
+
+    def flush_history(self):
+        self._history.flush()
+
+    def close_history(self):
+        self._history.close()
 
     # ---------- Helpers ----------
     def key_for_entry(self, entry):
@@ -406,65 +1105,16 @@ class YouTubeDownloaderApp(QMainWindow):
         # some extract_flat entries have URL as id-like
         return entry.get("url") or entry.get("webpage_url") or entry.get("title") or str(id(entry))
 
-    def set_item_widget(self, entry, idx):
-        """
-        Create a QWidget per list item: [checkbox label] [progressbar]
-        """
-
-        entry["_original_index"] = idx 
-
-        title = entry.get("title", f"Video {idx}")
-        key = self.key_for_entry(entry)
-
-        item = QListWidgetItem()
-
-        # container widget
-        container = QWidget()
-        h = QHBoxLayout(container)
-        h.setContentsMargins(6, 4, 6, 4)
-
-        checkbox = QCheckBox(f"{idx}. {title}")
-        checkbox.setChecked(True)
-        checkbox.setStyleSheet("color: #ECEFF4;")
-
-        bar = QProgressBar()
-        bar.setMinimum(0)
-        bar.setMaximum(100)
-        bar.setValue(0)
-        bar.setStyleSheet(
-            "QProgressBar { background-color: #4C566A; color: #D8DEE9; padding: 2px; border-radius: 4px; }"
-            "QProgressBar::chunk { background-color: #88C0D0; border-radius: 4px; }"
-        )
-
-        h.addWidget(checkbox, stretch=5)
-        h.addWidget(bar, stretch=2)
-
-        self.video_list.addItem(item)
-        self.video_list.setItemWidget(item, container)
-        self.item_widgets[key] = {
-            "item": item,
-            "bar": bar,
-            "checkbox": checkbox,
-            "entry": entry
-        }
-
-
-    def visible_text(self, item):
-        w = self.video_list.itemWidget(item)
-        if not w:
-            return item.text()
-        lbl = w.findChild(QLabel)
-        return lbl.text() if lbl else item.text()
+    def entry_for_key(self, key):
+        row = self.model.row_for_key(key)
+        return self.playlist_items[row] if row is not None else {}
 
     # ---------- Actions ----------
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Download Folder")
         if folder:
             self.folder_path.setText(folder)
-            self.history_path = os.path.join(folder, "download_history.jsonl")
-            if not os.path.exists(self.history_path):
-                with open(self.history_path, "w", encoding="utf-8") as f:
-                    pass
+            self.open_history(folder)
                 
     def fetch_info(self):
         url = self.url_entry.text().strip()
@@ -473,96 +1123,70 @@ class YouTubeDownloaderApp(QMainWindow):
             return
 
         self.append_status("Fetching information…", "info")
-        # ydl_opts = {'extract_flat': True, 'quiet': True}
-        ydl_opts = {
-            'extract_flat': True,
-            'quiet': True,
-            # 'cookies': r"E:\myWorkPlace\PROJECTS\youtube-downloader\temp_files\yt-cookies.txt",
-            # 'cookiesfrombrowser': ('chrome',),  # or use 'cookies': r"C:\path\to\cookies.txt"
-            'cookies_from_browser': ('chrome',),
-        }
-
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                if not info:
-                    QMessageBox.warning(self, "Error", "Unable to fetch info. The URL may be empty or unavailable.")
-                    return
 
-                # Normalize to list of entries (playlist or single)
-                entries = []
-                if "entries" in info and isinstance(info["entries"], list):
-                    # playlist
-                    entries = info["entries"]
-                    title = info.get('title', 'N/A')
-                    uploader = info.get('uploader', 'N/A')
-                    count = info.get('playlist_count', len(entries))
-                    summary = f"Type: Playlist\nTitle: {title}\nVideos: {count}\nUploader: {uploader}"
-                else:
-                    # single video
-                    entries = [info]
-                    summary = f"Type: Single Video\nTitle: {info.get('title','N/A')}\nUploader: {info.get('uploader','N/A')}"
-
-                self.playlist_items = entries
-                self.playlist_info_label.setText(summary)
-
-                # Populate list with widgets
-                self.video_list.clear()
-                self.item_widgets.clear()
-                for idx, entry in enumerate(self.playlist_items, start=1):
-                    # For extract_flat playlist, entry['url'] may be video ID; construct a full URL
-                    if entry.get("url") and "http" not in entry["url"]:
-                        entry["webpage_url"] = f"https://www.youtube.com/watch?v={entry['url']}"
-                    elif entry.get("webpage_url") is None and entry.get("url"):
-                        entry["webpage_url"] = entry["url"]
-                    self.set_item_widget(entry, idx)
-
-                self.append_status("Info fetched successfully.", "success")
-
-        except GeoRestrictedError:
-            QMessageBox.critical(self, "Geo-Restricted", "This content is not available in your region.")
-            self.signals.update_status.emit("Error: Geo-restricted content.", "error")
-        except ExtractorError as e:
-            QMessageBox.critical(self, "Extractor Error", f"Could not extract info: {e}")
-            self.signals.update_status.emit(f"Extractor error: {e}", "error")
-        except UnsupportedError:
-            QMessageBox.critical(self, "Unsupported URL", "Unsupported link. Provide a valid YouTube URL.")
-            self.signals.update_status.emit("Unsupported URL.", "error")
-        except socket.timeout:
-            QMessageBox.critical(self, "Network Timeout", "Request to YouTube timed out. Check your connection.")
-            self.signals.update_status.emit("Network timeout.", "error")
-        except DownloadError as e:
-            QMessageBox.critical(self, "Download Error", f"yt-dlp failed to fetch info: {e}")
-            self.signals.update_status.emit(f"Download error: {e}", "error")
-        except Exception as e:
-            QMessageBox.critical(self, "Unknown Error", f"An unexpected error occurred: {str(e)}")
-            self.signals.update_status.emit(f"Unexpected error: {str(e)}", "error")
+        # supersede any fetch still streaming
+        if self._fetch_worker:
+            self._fetch_worker.stopped = True
+        self._fetch_gen += 1
+        self.playlist_items = []
+        self._urls = []
+        self.model.set_rows([], [])
+        self.playlist_info_label.setText("")
+
+        # the worker exports Chrome cookies first and reports the path via cookies_ready
+        self._fetch_worker = FetchWorker(url, self._fetch_gen, self.signals)
+        self._aux_pool.start(self._fetch_worker)
+
+    def on_cookies_ready(self, gen, path):
+        if gen == self._fetch_gen:
+            self._cookie_path = path or None
+
+    def on_fetch_summary(self, gen, summary):
+        if gen == self._fetch_gen:
+            self.playlist_info_label.setText(summary)
+
+    def on_entries_batch(self, gen, entries):
+        if gen != self._fetch_gen:
+            return
+        # one beginInsertRows/endInsertRows per batch
+        keys, titles = [], []
+        for idx, entry in enumerate(entries, start=len(self.playlist_items) + 1):
+            # For extract_flat playlist, entry['url'] may be video ID; construct a full URL
+            if entry.get("url") and "http" not in entry["url"]:
+                entry["webpage_url"] = f"https://www.youtube.com/watch?v={entry['url']}"
+            elif entry.get("webpage_url") is None and entry.get("url"):
+                entry["webpage_url"] = entry["url"]
+            entry["_original_index"] = idx
+            # resolved once here; selection/resume just read self._urls
+            entry["_full_url"] = entry.get("webpage_url") or entry.get("url")
+            self._urls.append(entry["_full_url"])
+            keys.append(self.key_for_entry(entry))
+            titles.append(f"{idx}. {entry.get('title', f'Video {idx}')}")
+        self.playlist_items.extend(entries)
+        self.model.append_rows(keys, titles)
+
+    def on_fetch_failed(self, gen, title, message):
+        if gen == self._fetch_gen:
+            QMessageBox.critical(self, title, message)
+
+    def on_fetch_done(self, gen):
+        if gen == self._fetch_gen:
+            self._fetch_worker = None
+            self.append_status(f"Info fetched successfully ({len(self.playlist_items)} item(s)).", "success")
 
     def apply_filter(self, text):
-        text = text.lower().strip()
-        for i in range(self.video_list.count()):
-            item = self.video_list.item(i)
-            w = self.video_list.itemWidget(item)
-            lbl = w.findChild(QLabel) if w else None
-            s = (lbl.text() if lbl else item.text()).lower()
-            item.setHidden(text not in s)
+        self.proxy.set_pattern(text)
 
     def toggle_select_all(self):
-        all_checked = all(meta["checkbox"].isChecked() for meta in self.item_widgets.values())
-        new_state = not all_checked
-        for meta in self.item_widgets.values():
-            meta["checkbox"].setChecked(new_state)
+        self.model.set_all_checked(not self.model.all_checked())
 
 
     def gather_selected_urls(self):
-        selected = []
-        for key, meta in self.item_widgets.items():
-            if meta["checkbox"].isChecked():
-                entry = meta["entry"]
-                url = entry.get("webpage_url") or entry.get("url")
-                if url:
-                    selected.append((key, url))
-        return selected
+        return [
+            (key, url)
+            for key, url, checked in zip(self.model.keys(), self._urls, self.model.checked())
+            if checked and url
+        ]
 
 
     def download_selected_videos(self):
@@ -583,61 +1207,69 @@ class YouTubeDownloaderApp(QMainWindow):
             QMessageBox.warning(self, "Selection Error", "No videos selected.")
             return
 
-        # reset flags
-        self.flags["cancel"] = False
-        self.flags["pause"] = False
+        # reset pause/cancel
+        self.cancel_evt.clear()
+        self.pause_evt.clear()
 
         # prepare history path if not set
         if not self.history_path:
-            self.history_path = os.path.join(folder, "download_history.jsonl")
+            self.open_history(folder)
 
-        # set threadpool concurrency
-        self.threadpool.setMaxThreadCount(self.conc_spin.value())
         self.append_status(f"Starting downloads ({len(sel)} item(s)) with concurrency = {self.conc_spin.value()}…", "info")
 
-        # launch one worker per selected url
-        for key, url in sel:
-            meta = self.item_widgets.get(key)
-            entry = meta["entry"] if meta else {}
+        # reset per-item progress
+        for key, _ in sel:
+            self.model.set_progress(key, 0)
+
+        self.start_batched_workers(sel, folder, quality)
+
+    def build_templates(self, pairs):
+        """
+        Per-key output templates, prefixed with the zero-padded playlist index.
+        """
+        templates = {}
+        for key, _ in pairs:
+            entry = self.entry_for_key(key)
             orig_index = entry.get("_original_index", 0)
             zindex = str(orig_index).zfill(3)   # fixed 3 digits
-            per_tmpl = f"{zindex} - %(title).200s.%(ext)s"
-
-            # reset per-item progress if available
-            if meta:
-                meta["bar"].setValue(0)
+            templates[key] = f"{zindex} - %(title).200s.%(ext)s"
+        return templates
 
+    def start_batched_workers(self, pairs, folder, quality):
+        """
+        Split pairs into one slice per concurrency slot; each slice shares one YoutubeDL.
+        """
+        templates = self.build_templates(pairs)
+        n = max(1, min(self.conc_spin.value(), len(pairs)))
+        for i in range(n):
             worker = DownloadWorker(
-                url=url,
-                key=key,
+                pairs=pairs[i::n],
+                templates=templates,
                 folder=folder,
                 quality=quality,
-                tmpl=per_tmpl,
                 signals=self.signals,
-                flags=self.flags
+                pause_evt=self.pause_evt,
+                cancel_evt=self.cancel_evt,
+                cookie_path=self._cookie_path,
+                connections=self.frag_spin.value()
             )
-            self.threadpool.start(worker)
-
-
-
+            self._dl_pool.start(worker)
 
     def pause_downloads(self):
-        self.flags["pause"] = True
+        self.pause_evt.set()
         self.append_status("Pause requested. Current tasks will stop safely; resume will continue.", "warning")
 
     def resume_downloads(self):
         # "resume" is simply clearing pause and re-issuing downloads for anything not at 100%.
         if not self.playlist_items:
             return
-        self.flags["pause"] = False
+        self.pause_evt.clear()
         # collect not-complete items among checked ones
-        pending = []
-        for key, meta in self.item_widgets.items():
-            if meta["item"].checkState() == Qt.Checked and meta["bar"].value() < 100:
-                entry = meta["entry"]
-                url = entry.get("webpage_url") or entry.get("url")
-                if url:
-                    pending.append((key, url))
+        pending = [
+            (key, url)
+            for key, url, checked, pct in zip(self.model.keys(), self._urls, self.model.checked(), self.model.progress())
+            if checked and pct < 100 and url
+        ]
         if not pending:
             self.append_status("Nothing to resume; all selected items appear complete.", "info")
             return
@@ -645,40 +1277,31 @@ class YouTubeDownloaderApp(QMainWindow):
         self.download_specific(pending)
 
     def cancel_downloads(self):
-        self.flags["cancel"] = True
+        self.cancel_evt.set()
         self.append_status("Cancellation requested. Active tasks will terminate shortly.", "warning")
 
     def download_specific(self, pairs):
         folder = self.folder_path.text().strip()
         quality = self.quality_combobox.currentText()
-        tmpl = "%(title).200s.%(ext)s"
 
-
-        self.threadpool.setMaxThreadCount(self.conc_spin.value())
-        for key, url in pairs:
-            worker = DownloadWorker(
-                url=url,
-                key=key,
-                folder=folder,
-                quality=quality,
-                tmpl=tmpl,
-                signals=self.signals,
-                flags=self.flags
-            )
-            self.threadpool.start(worker)
+        self.start_batched_workers(pairs, folder, quality)
 
     def update_ytdlp(self):
-        try:
-            self.append_status("Updating yt-dlp via pip…", "info")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-U", "yt-dlp"])
-            self.append_status("yt-dlp updated successfully. Please restart the app to use the new version.", "success")
-        except subprocess.CalledProcessError as e:
-            self.append_status(f"yt-dlp update failed: {e}", "error")
+        self.update_button.setEnabled(False)
+        self.append_status("Updating yt-dlp via pip…", "info")
+        self._aux_pool.start(PipUpdateWorker(self.signals))
+
+    def ytdlp_update_done(self, ok):
+        self.update_button.setEnabled(True)
 
     # ---------- Entry point ----------
     def closeEvent(self, event):
         # best-effort to stop workers
-        self.flags["cancel"] = True
+        self.cancel_evt.set()
+        # tagging runs on daemon threads; let queued ID3 writes land before the process exits
+        wait_for_pending_tags(timeout=TAG_FLUSH_TIMEOUT)
+        self.close_history()
+        remove_cookie_files()
         super().closeEvent(event)
 
 def main():
@@ -1,27 +1,46 @@
 # yt_dlp_gemini_tagger.py
 
 import os
+import re
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import queue
+import threading
+import functools
 import requests
-from typing import Optional
+from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, wait
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from mutagen.mp3 import MP3
 from mutagen.id3 import (
-    ID3, TIT2, TPE1, TALB, TCON, TDRC, COMM, APIC, TXXX, error,
+    ID3, ID3NoHeaderError, TIT2, TPE1, TALB, TCON, TDRC, COMM, APIC, TXXX,
     TRCK, TPOS, USLT, TPUB, TBPM, TKEY, TSRC, TSSE, TDOR, TCOP,
     WXXX, POPM, TIT3, TPE2, TCOM
 )
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from dotenv import load_dotenv
 
 from yt_dlp.postprocessor.common import PostProcessor
 
-# --- Load API key ---
+try:
+    import aiohttp
+except ImportError:  # optional: covers are then fetched one by one over the shared session
+    aiohttp = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional: covers are then embedded exactly as downloaded
+    Image = None
+
+# --- Load .env (GOOGLE_API_KEY and the TAGGER_* settings below) ---
 load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
 
 # --- Define structured metadata model ---
 class MP3Tags(BaseModel):
@@ -57,130 +76,738 @@ class MP3Tags(BaseModel):
 
 
 # --- Gemini setup ---
-model = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.1,
-    # max_output_tokens=1024,
-    google_api_key=google_api_key
-)
-parser = PydanticOutputParser(pydantic_object=MP3Tags)
+# Filename parsing is a light extraction task: the lite model with thinking
+# disabled is enough. Set TAGGER_MODEL=gemini-2.5-flash if accuracy regresses.
+MODEL_NAME = os.getenv("TAGGER_MODEL", "gemini-2.5-flash-lite")
+# Bump whenever the prompt or MP3Tags changes so cached tags are not reused
+TEMPLATE_VERSION = 3
+# Concurrent tagging jobs (TaggingPipeline workers); also caps the Gemini batch size
+TAGGER_WORKERS = int(os.getenv("TAGGER_WORKERS", "8"))
+
+
+@functools.cache
+def get_client():
+    """
+    Gemini client, created on first use. google.genai is imported here so that
+    starting the app (or downloading without MP3 tagging) never pays for it.
+
+    Memoized, so every request shares one client and its connection pool.
+
+    Transient errors (429/5xx) are retried by the SDK only, with a bounded backoff;
+    nothing else in this module retries a failed request.
+    """
+    from google import genai
+    from google.genai import types
+    # re-read .env here so a key added after import is still picked up
+    load_dotenv()
+    return genai.Client(
+        api_key=os.getenv("GOOGLE_API_KEY"),
+        http_options=types.HttpOptions(
+            retry_options=types.HttpRetryOptions(attempts=3, initial_delay=0.5, exp_base=2.0, max_delay=4.0),
+        ),
+    )
+
 
-prompt = PromptTemplate(
-    template="""
-Given the following MP3 filename, extract structured metadata tags suitable for a music song/audio story.
+# Static instructions first, dynamic filename last: the prefix is identical on
+# every call, which is what Gemini's implicit prefix caching matches on. (At ~60
+# tokens it is far below the explicit-cache minimum, so no cache object is created.)
+# The output shape is enforced by response_schema, so no schema text is sent in the prompt.
+# Whitespace is collapsed once at import so every request sends the same compact prefix.
+SYSTEM_PROMPT = re.sub(r"\s+", " ", """
+Given an MP3 filename, extract structured metadata tags suitable for a music song/audio story.
 The filename may contain extra information like channel name, album name, upload date or extraneous symbols.
-Focus on extracting clean and relevant tags only. 
+Focus on extracting clean and relevant tags only.
+""").strip()
+BATCH_INSTRUCTIONS = (
+    "Extract tags for each numbered filename below. "
+    "Return a JSON array with exactly one object per filename, in the same order."
+)
+
+
+def _generate(contents: str, schema):
+    from google.genai import types
+    config = types.GenerateContentConfig(
+        system_instruction=SYSTEM_PROMPT,
+        temperature=0.1,
+        response_mime_type="application/json",
+        response_schema=schema,
+        thinking_config=types.ThinkingConfig(thinking_budget=0),
+    )
+    return get_client().models.generate_content(
+        model=MODEL_NAME,
+        contents=contents,
+        config=config,
+    )
+
+
+def _json_text(text: str) -> str:
+    """Response text with an accidental ```json ... ``` fence removed."""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def generate_tags(filename: str) -> MP3Tags:
+    response = _generate(f"Filename: {filename}", MP3Tags)
+    return MP3Tags.model_validate_json(_json_text(response.text))
+
+
+# builtin list[...]: google-genai's schema conversion rejects typing.List
+# ("Unsupported schema type") before any request is sent
+TAGS_LIST_SCHEMA = list[MP3Tags]
+_tags_list = TypeAdapter(TAGS_LIST_SCHEMA)
+
 
-Filename: {filename}
+def generate_tags_batch(filenames: List[str]) -> List[MP3Tags]:
+    """One request for many filenames; results come back in input order."""
+    listing = "\n".join(f"{i}. {name}" for i, name in enumerate(filenames, start=1))
+    # static instructions first, so only the tail of the request differs between batches
+    contents = f"{BATCH_INSTRUCTIONS}\n\n{len(filenames)} filenames:\n{listing}"
+    response = _generate(contents, TAGS_LIST_SCHEMA)
+    return _tags_list.validate_json(_json_text(response.text))
 
-{format_instructions}
-""",
-    input_variables=["filename"],
-    partial_variables={"format_instructions": parser.get_format_instructions()},
+
+class BatchingGeminiTagger:
+    """
+    Collects filenames from concurrent postprocessor runs and tags them with one
+    Gemini request per batch. A batch is flushed at BATCH_SIZE items or MAX_WAIT
+    seconds after its first item. If the batch reply is malformed each file is tagged
+    on its own; if the request itself fails, every file in it gets that error.
+    """
+    BATCH_SIZE = 16
+    MAX_WAIT = 2.0  # seconds
+
+    def __init__(self, batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._q = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, filename: str) -> Future:
+        """Future resolving to the MP3Tags for filename; covers are left to the caller."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="gemini-batcher", daemon=True)
+                self._thread.start()
+        fut = Future()
+        self._q.put((filename, fut))
+        return fut
+
+    def tag(self, filename: str) -> MP3Tags:
+        return self.submit(filename).result()
+
+    def _loop(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        results = None
+        if len(batch) > 1:
+            try:
+                results = generate_tags_batch([name for name, _ in batch])
+            except ValueError as e:
+                # malformed reply (includes pydantic's ValidationError): worth asking per file
+                print(f"[WARN] Batched tagging failed, tagging files one by one: {e}")
+            except Exception as e:
+                # request still failing after the client's retries; per-file calls would only
+                # stack more backoff, so every file goes straight to its minimal fallback
+                for _, fut in batch:
+                    fut.set_exception(e)
+                return
+        if results is None or len(results) != len(batch):
+            results = []
+            for name, _ in batch:
+                try:
+                    results.append(generate_tags(name))
+                except Exception as e:
+                    results.append(e)
+
+        # no cover downloads here: the next batch should not wait behind them
+        for (_, fut), tags in zip(batch, results):
+            if isinstance(tags, Exception):
+                fut.set_exception(tags)
+            else:
+                fut.set_result(tags)
+
+
+# At most TAGGER_WORKERS jobs can wait on the batcher at once; a larger batch size
+# could never fill, and every batch would sit out the full MAX_WAIT.
+gemini_batcher = BatchingGeminiTagger(batch_size=min(BatchingGeminiTagger.BATCH_SIZE, TAGGER_WORKERS))
+
+
+# --- Persistent tag cache (skips the LLM for filenames already tagged) ---
+def _cache_dir() -> str:
+    return os.getenv("TAGGER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "yt-tagger")
+
+
+# Bracketed upload noise such as "[Official Video]", "(Lyrics)", "(HD)" or "[2021-05-04]".
+# Brackets that change the recording ("(Remix)", "(Live)") are left alone.
+_BRACKET_NOISE = re.compile(
+    r"[\[\(][^\]\)]*\b(?:official|video|audio|lyrics?|visuali[sz]er|hd|hq|4k|mv|\d{4}[-./]?\d{2}[-./]?\d{2})\b[^\]\)]*[\]\)]"
 )
+# The same noise once brackets are gone (restrictfilenames turns "(Official Video)" into "_Official_Video")
+_TRAILING_NOISE = re.compile(
+    r"(?:\s+(?:official(?:\s+music)?\s+(?:video|audio)|lyrics?(?:\s+video)?|visuali[sz]er|hd|hq|4k|mv|\d{4}(?:\s\d{2}){2}|\d{8}))+$"
+)
+# "NNN - " prefix from DownloadWorker's per-item outtmpl
+_PLAYLIST_INDEX = re.compile(r"^\d{3} - ")
 
 
-chain = prompt | model | parser
+def cache_name_for(info: dict, filename: str) -> str:
+    """
+    What the tag cache is keyed on: yt-dlp's title (unsanitized, no playlist-index prefix)
+    when known, else the filename without that prefix.
+    """
+    return info.get("title") or _PLAYLIST_INDEX.sub("", filename)
 
 
-# --- Helper function to tag MP3 ---
-def tag_mp3(file_path: str, tags: MP3Tags):
-    audio = MP3(file_path, ID3=ID3)
+def normalize_filename(filename: str) -> str:
+    """
+    Cache-key form of a title or filename: no extension or upload noise, lowercase,
+    single-spaced; "_" (from restrictfilenames), "-" and brackets count as spaces.
+    """
+    name = filename.lower().strip()
+    if name.endswith(".mp3"):
+        name = name[:-4]
+    name = _BRACKET_NOISE.sub(" ", name.replace("_", " "))
+    # leftover brackets go too, so "Song (Remix)" and its sanitized "Song_Remix" share a key
+    name = " ".join(re.sub(r"[-\[\]()]+", " ", name).split())
+    return _TRAILING_NOISE.sub("", name)
+
+
+class TagCache:
+    """
+    SQLite-backed cache of MP3Tags JSON keyed by model + prompt version + normalized filename,
+    so re-uploads that differ only in "[Official Video]"-style suffixes share one entry.
+    Disable with TAGGER_CACHE=0; location via TAGGER_CACHE_DIR (default ~/.cache/yt-tagger).
+    """
+    TTL = 30 * 24 * 3600  # seconds
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if not enabled:
+            return
+        try:
+            if path is None:
+                cache_dir = _cache_dir()
+                os.makedirs(cache_dir, exist_ok=True)
+                path = os.path.join(cache_dir, "tags.sqlite3")
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS tags (key TEXT PRIMARY KEY, json TEXT, ts INTEGER)")
+            self._db.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] Tag cache disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def key_for(filename: str) -> str:
+        raw = json.dumps({"model": MODEL_NAME, "tpl": TEMPLATE_VERSION, "name": normalize_filename(filename)}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, filename: str) -> Optional[MP3Tags]:
+        if not self._db:
+            return None
+        key = self.key_for(filename)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT json FROM tags WHERE key = ? AND ts >= ?",
+                (key, int(time.time()) - self.TTL),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                tags = MP3Tags.model_validate_json(row[0])
+            except (ValidationError, ValueError):
+                # stale schema or truncated write: drop it and let Gemini tag the file again
+                self._db.execute("DELETE FROM tags WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self.hits += 1
+        return tags
+
+    def put(self, filename: str, tags: MP3Tags):
+        if not self._db:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tags (key, json, ts) VALUES (?, ?, ?)",
+                (self.key_for(filename), tags.model_dump_json(), int(time.time())),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+@functools.cache
+def get_tag_cache() -> TagCache:
+    """Shared TagCache, opened on first use so the GUI never touches SQLite unless tagging."""
+    return TagCache(enabled=os.getenv("TAGGER_CACHE", "1") != "0")
+
+
+# --- Shared HTTP session (pooled keep-alive connections, reused by every postprocessor instance) ---
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
+SESSION.headers["User-Agent"] = "Mozilla/5.0 (yt-dlp-gemini-tagger)"
+
+
+# --- Cover art download (concurrent, over the tagging pipeline's shared aiohttp session) ---
+def _aiohttp_session() -> "aiohttp.ClientSession":
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=16),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+
+
+async def fetch_covers(urls: Iterable[str], session: Optional["aiohttp.ClientSession"] = None) -> Dict[str, bytes]:
+    """url -> bytes over aiohttp; uses session if given, else a throwaway one for this batch."""
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+
+    async def fetch(session, url):
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+    if session is not None:
+        results = await asyncio.gather(*(fetch(session, u) for u in urls), return_exceptions=True)
+    else:
+        async with _aiohttp_session() as session:
+            results = await asyncio.gather(*(fetch(session, u) for u in urls), return_exceptions=True)
+
+    covers = {}
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            print(f"[WARN] Failed to add cover art: {result}")
+        else:
+            covers[url] = result
+    return covers
+
+
+def _image_mime(data: bytes) -> str:
+    """Image type from the magic bytes; used for the APIC mime and the cache file suffix."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+_IMAGE_SUFFIX = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+
+
+class CoverCache:
+    """
+    Cover bytes by URL: an in-memory LRU in front of <sha1(url)>.<jpg|png|webp> files
+    under TAGGER_CACHE_DIR/covers (suffix from the image's magic bytes). Playlist items often share one thumbnail (albums,
+    same-channel uploads), so only the first of them reaches the network.
+    """
+    MAX_ITEMS = 256
+
+    def __init__(self, path: Optional[str] = None, persist: bool = True):
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self._dir = None
+        if not persist:
+            return
+        try:
+            path = path or os.path.join(_cache_dir(), "covers")
+            os.makedirs(path, exist_ok=True)
+            self._dir = path
+        except OSError as e:
+            print(f"[WARN] Cover disk cache disabled: {e}")
+
+    def _files(self, url: str) -> Dict[str, str]:
+        """mime -> cache path; one URL has at most one of them on disk."""
+        stem = os.path.join(self._dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        return {mime: stem + suffix for mime, suffix in _IMAGE_SUFFIX.items()}
+
+    def _remember(self, url: str, data: bytes):
+        with self._lock:
+            self._mem[url] = data
+            self._mem.move_to_end(url)
+            while len(self._mem) > self.MAX_ITEMS:
+                self._mem.popitem(last=False)
+
+    def get(self, url: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(url)
+            if data is not None:
+                self._mem.move_to_end(url)
+                return data
+        if self._dir is None:
+            return None
+        for path in self._files(url).values():
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            self._remember(url, data)
+            return data
+        return None
+
+    def put(self, url: str, data: bytes):
+        self._remember(url, data)
+        if self._dir is None:
+            return
+        files = self._files(url)
+        path = files.pop(_image_mime(data))
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Could not cache cover art: {e}")
+            return
+        # an older copy in another format (e.g. stored before Pillow was installed)
+        for stale in files.values():
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+@functools.cache
+def get_cover_cache() -> CoverCache:
+    """Shared CoverCache; like get_tag_cache(), the cache directory is only created on first use."""
+    return CoverCache(persist=os.getenv("TAGGER_CACHE", "1") != "0")
+
+
+COVER_MAX_SIZE = (600, 600)
+
+
+def shrink_cover(data: bytes) -> bytes:
+    """
+    Re-encode a downloaded thumbnail as a JPEG of at most COVER_MAX_SIZE (quality 85).
+    YouTube thumbnails are often 1280x720 PNG/WebP; embedded as-is they add ~200 KB per file.
+    Returns data unchanged if Pillow is missing or the image cannot be decoded.
+    """
+    if Image is None:
+        return data
     try:
-        audio.add_tags()
-    except error:
-        pass
-
-    def set_tag(key, frame):
-        if key in audio.tags:
-            del audio.tags[key]
-        audio.tags.add(frame)
-
-    # Only set if meaningful (not None/Unknown/empty)
-    def valid(val: Optional[str]):
-        return val and val.strip() and val.strip().lower() != "unknown"
-    
-    # Core
-    if valid(tags.title): set_tag("TIT2", TIT2(encoding=3, text=tags.title))
-    if valid(tags.artist): set_tag("TPE1", TPE1(encoding=3, text=tags.artist))
-    if valid(tags.album): set_tag("TALB", TALB(encoding=3, text=tags.album))
-    if valid(tags.track): set_tag("TRCK", TRCK(encoding=3, text=tags.track))
-    if valid(tags.disc): set_tag("TPOS", TPOS(encoding=3, text=tags.disc))
-    if valid(tags.year): set_tag("TDRC", TDRC(encoding=3, text=tags.year))
-    if valid(tags.genre): set_tag("TCON", TCON(encoding=3, text=tags.genre))
-    if valid(tags.composer): set_tag("TCOM", TCOM(encoding=3, text=tags.composer))
-    if valid(tags.publisher): set_tag("TPUB", TPUB(encoding=3, text=tags.publisher))
-    if valid(tags.lyrics): set_tag("USLT", USLT(encoding=3, lang="eng", desc="", text=tags.lyrics))
-    if valid(tags.comments): set_tag("COMM", COMM(encoding=3, desc="desc", text=tags.comments))
+        img = Image.open(BytesIO(data)).convert("RGB")
+        img.thumbnail(COVER_MAX_SIZE, Image.LANCZOS)
+        buf = BytesIO()
+        img.save(buf, "JPEG", quality=85, optimize=True, progressive=True)
+    except Exception as e:
+        print(f"[WARN] Could not recompress cover art, embedding original: {e}")
+        return data
+    return buf.getvalue()
+
+
+def _cached_covers(urls: Iterable[str]) -> Tuple[Dict[str, bytes], List[str]]:
+    """(covers already in the cover cache, urls still to download)"""
+    cover_cache = get_cover_cache()
+    covers = {}
+    missing = []
+    for url in dict.fromkeys(u for u in urls if u):
+        data = cover_cache.get(url)
+        if data is None:
+            missing.append(url)
+        else:
+            covers[url] = data
+    return covers, missing
+
+
+def _fetch_covers_sync(urls: Iterable[str]) -> Dict[str, bytes]:
+    covers = {}
+    for url in urls:
+        try:
+            resp = SESSION.get(url, timeout=10)
+            resp.raise_for_status()
+            covers[url] = resp.content
+        except Exception as e:
+            print(f"[WARN] Failed to add cover art: {e}")
+    return covers
+
 
+def _store_covers(fetched: Dict[str, bytes]) -> Dict[str, bytes]:
+    # shrink once per URL; the cache then holds the embed-ready bytes
+    cover_cache = get_cover_cache()
+    stored = {}
+    for url, data in fetched.items():
+        data = shrink_cover(data)
+        cover_cache.put(url, data)
+        stored[url] = data
+    return stored
+
+
+# --- Helper function to tag MP3 ---
+# (MP3Tags attribute, ID3 frame id, frame class, extra frame kwargs)
+TEXT_FRAMES = (
+    # Core
+    ("title", "TIT2", TIT2, {}),
+    ("artist", "TPE1", TPE1, {}),
+    ("album", "TALB", TALB, {}),
+    ("track", "TRCK", TRCK, {}),
+    ("disc", "TPOS", TPOS, {}),
+    ("year", "TDRC", TDRC, {}),
+    ("genre", "TCON", TCON, {}),
+    ("composer", "TCOM", TCOM, {}),
+    ("publisher", "TPUB", TPUB, {}),
+    ("lyrics", "USLT", USLT, {"lang": "eng", "desc": ""}),
+    ("comments", "COMM", COMM, {"desc": "desc"}),
     # Extended
-    if valid(tags.album_artist): set_tag("TPE2", TPE2(encoding=3, text=tags.album_artist))
-    if valid(tags.bpm): set_tag("TBPM", TBPM(encoding=3, text=tags.bpm))
-    if valid(tags.key): set_tag("TKEY", TKEY(encoding=3, text=tags.key))
-    if valid(tags.isrc): set_tag("TSRC", TSRC(encoding=3, text=tags.isrc))
-    if valid(tags.encoder): set_tag("TSSE", TSSE(encoding=3, text=tags.encoder))
-    if valid(tags.original_date): set_tag("TDOR", TDOR(encoding=3, text=tags.original_date))
-    if valid(tags.copyright): set_tag("TCOP", TCOP(encoding=3, text=tags.copyright))
-    if valid(tags.website): set_tag("WXXX", WXXX(encoding=3, desc="Website", url=tags.website))
+    ("album_artist", "TPE2", TPE2, {}),
+    ("bpm", "TBPM", TBPM, {}),
+    ("key", "TKEY", TKEY, {}),
+    ("isrc", "TSRC", TSRC, {}),
+    ("encoder", "TSSE", TSSE, {}),
+    ("original_date", "TDOR", TDOR, {}),
+    ("copyright", "TCOP", TCOP, {}),
+    ("subtitle", "TIT3", TIT3, {}),
+)
+
+
+# Values the model (or MP3Tags defaults) use for "no data"; such fields are not written
+_PLACEHOLDERS = frozenset({"", "unknown", "none", "n/a"})
+
+
+def valid(val: Optional[str]) -> bool:
+    """True if val is meaningful (not None/empty/a placeholder); strips only once."""
+    return bool(val) and val.strip().lower() not in _PLACEHOLDERS
+
+
+def tag_mp3(file_path: str, tags: MP3Tags, img_data: Optional[bytes] = None):
+    """Write tags to file_path; img_data (already downloaded) becomes the APIC cover."""
+    # Build every frame first, then touch the tag once per frame id
+    frames = []
+
+    # Text frames (core + extended)
+    for attr, key, frame_cls, extra in TEXT_FRAMES:
+        val = getattr(tags, attr)
+        if valid(val):
+            frames.append((key, frame_cls(encoding=3, text=val, **extra)))
+
+    # Special frames
+    if valid(tags.website):
+        frames.append(("WXXX", WXXX(encoding=3, desc="Website", url=tags.website)))
     if valid(tags.rating):
         try:
             rating_val = int(tags.rating)
-            set_tag("POPM", POPM(email="user@example.com", rating=rating_val, count=0))
+            frames.append(("POPM", POPM(email="user@example.com", rating=rating_val, count=0)))
         except ValueError:
             pass
-    if valid(tags.subtitle): set_tag("TIT3", TIT3(encoding=3, text=tags.subtitle))
 
     # Cover Art
-    if valid(tags.cover_url):
-        try:
-            resp = requests.get(tags.cover_url, timeout=10)
-            resp.raise_for_status()
-            img_data = resp.content
-            set_tag("APIC", APIC(
-                encoding=3,
-                mime="image/jpeg",
-                type=3,
-                desc="Cover",
-                data=img_data,
-            ))
-        except Exception as e:
-            print(f"[WARN] Failed to add cover art: {e}")
+    if img_data:
+        frames.append(("APIC", APIC(
+            encoding=3,
+            mime=_image_mime(img_data),
+            type=3,
+            desc="Cover",
+            data=img_data,
+        )))
 
-    audio.save()
+    # Only the ID3 header is parsed; the MPEG frames (bitrate, length) are never scanned
+    try:
+        id3 = ID3(file_path)
+    except ID3NoHeaderError:
+        id3 = ID3()
+    # Frames written earlier by FFmpegMetadata/EmbedThumbnail are kept unless replaced here
+    for key, frame in frames:
+        id3.setall(key, [frame])
 
+    # ID3v2.3 for the widest player support. Keep whatever padding is left while the tag
+    # still fits (an in-place, header-only write); only when the file has to be rewritten
+    # anyway, reserve 8 KB so later retags fit again.
+    # (info.padding is what would be left after this write, negative if the tag outgrew it)
+    # Frames are held in v2.4 form (TDRC, TDOR); convert them to TYER/TDAT/TORY first,
+    # or strict v2.3 readers drop the year and original date.
+    id3.update_to_v23()
+    id3.save(file_path, v2_version=3, padding=lambda info: info.padding if info.padding >= 0 else 8192)
 
-# --- yt-dlp postprocessor class ---
-class GeminiID3PostProcessor(PostProcessor):
-    """Custom yt-dlp postprocessor to retag MP3 using Gemini API."""
 
-    def run(self, info):
-        file_path = info.get("filepath") or info.get("requested_downloads")[0]["filepath"]
+def from_info(info: dict) -> Optional[MP3Tags]:
+    """
+    Build tags straight from yt-dlp metadata (e.g. YouTube Music uploads).
+    Returns None unless both track title and artist are present.
+    """
+    title = (info.get("track") or "").strip()
+    artist = (info.get("artist") or ", ".join(info.get("artists") or [])).strip()
+    if not title or not artist:
+        return None
+    year = info.get("release_year")
+    return MP3Tags(
+        title=title,
+        artist=artist,
+        album=info.get("album") or "Unknown",
+        year=str(year) if year else "Unknown",
+        album_artist=info.get("uploader") or "Unknown",
+        cover_url=info.get("thumbnail"),
+    )
 
-        if not file_path.lower().endswith(".mp3"):
-            return [], info  # Only process MP3s
 
+# --- Tagging pipeline (postprocessor returns immediately; work runs here) ---
+class TaggingPipeline:
+    """
+    Background asyncio loop that tags finished MP3s. submit() puts a job on an
+    asyncio.Queue drained by `workers` coroutines, so Gemini waits, cover downloads
+    and ID3 writes of different files overlap. Blocking steps (SQLite, mutagen,
+    Pillow) run via asyncio.to_thread; covers share one aiohttp session.
+    """
+
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+        self._loop = None
+        self._queue = None
+        self._session = None
+        self._tasks = []
+        # distinct files need no shared lock; this only serializes repeat jobs on one path
+        self._path_locks = defaultdict(asyncio.Lock)
+        self._start_lock = threading.Lock()
+
+    def submit(self, file_path: str, info: dict, log) -> Future:
+        with self._start_lock:
+            if self._loop is None:
+                self._start()
+        fut = Future()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (file_path, info, log, fut))
+        return fut
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="gemini-tag", daemon=True).start()
+        # queue and workers are created on the loop itself
+        asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+        self._loop = loop
+
+    async def _setup(self):
+        self._queue = asyncio.Queue()
+        if aiohttp is not None:
+            self._session = _aiohttp_session()
+        # keep references: the loop itself only holds tasks weakly
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            file_path, info, log, fut = await self._queue.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(await self._process_one(file_path, info, log))
+            except Exception as e:
+                fut.set_exception(e)
+
+    async def _covers(self, urls: Iterable[str]) -> Dict[str, bytes]:
+        covers, missing = await asyncio.to_thread(_cached_covers, urls)
+        if missing:
+            if self._session is not None:
+                fetched = await fetch_covers(missing, self._session)
+            else:
+                fetched = await asyncio.to_thread(_fetch_covers_sync, missing)
+            covers.update(await asyncio.to_thread(_store_covers, fetched))
+        return covers
+
+    async def _process_one(self, file_path: str, info: dict, log):
         filename = os.path.basename(file_path)
         uploader = info.get("uploader") or info.get("channel")
         thumbnail = info.get("thumbnail")
+        cache_name = cache_name_for(info, filename)
+        tag_cache = get_tag_cache()
 
-        try:
-            tags = chain.invoke({"filename": filename})
-            # Fallbacks for mandatory fields
-            if not tags.title:
-                tags.title = os.path.splitext(filename)[0]
-            if not tags.artist and uploader:
-                tags.artist = uploader
-            if not tags.cover_url and thumbnail:
-                tags.cover_url = thumbnail
-
-            tag_mp3(file_path, tags)
-            self.to_screen(f"[GeminiID3] Tagged: {os.path.basename(file_path)}")
+        async with self._path_locks[file_path]:
+            try:
+                tags = from_info(info)
+                if tags is not None:
+                    # yt-dlp already has clean metadata; no LLM call needed
+                    log(f"[GeminiID3] Using yt-dlp metadata for {filename}")
+                    img_data = (await self._covers([tags.cover_url])).get(tags.cover_url)
+                elif (tags := await asyncio.to_thread(tag_cache.get, cache_name)) is not None:
+                    log(f"[GeminiID3] Cache hit for {filename} ({tag_cache.stats()})")
+                    cover_url = tags.cover_url or thumbnail
+                    img_data = (await self._covers([cover_url])).get(cover_url)
+                else:
+                    # the batcher thread groups this with other files' requests
+                    tags = await asyncio.wrap_future(gemini_batcher.submit(filename))
+                    await asyncio.to_thread(tag_cache.put, cache_name, tags)
+                    cover_url = tags.cover_url or thumbnail
+                    img_data = (await self._covers([cover_url])).get(cover_url)
+                # Fallbacks for mandatory fields
+                if not tags.title:
+                    tags.title = os.path.splitext(filename)[0]
+                if not tags.artist and uploader:
+                    tags.artist = uploader
+                if not tags.cover_url and thumbnail:
+                    tags.cover_url = thumbnail
 
-        except Exception as e:
-            # Minimal fallback
-            fallback_title = os.path.splitext(filename)[0]
-            fallback_tags = MP3Tags(title=fallback_title, artist=uploader, cover_url=thumbnail)
-            tag_mp3(file_path, fallback_tags)
-            self.to_screen(f"[GeminiID3] Fallback tagging applied: {e}")
+                await asyncio.to_thread(tag_mp3, file_path, tags, img_data)
+                log(f"[GeminiID3] Tagged: {filename}")
+
+            except Exception as e:
+                # Minimal fallback
+                fallback_title = os.path.splitext(filename)[0]
+                fallback_tags = MP3Tags(title=fallback_title, artist=uploader, cover_url=thumbnail)
+                img_data = (await self._covers([thumbnail])).get(thumbnail)
+                await asyncio.to_thread(tag_mp3, file_path, fallback_tags, img_data)
+                log(f"[GeminiID3] Fallback tagging applied: {e}")
+
+
+pipeline = TaggingPipeline(workers=TAGGER_WORKERS)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _track(fut: Future):
+    with _pending_lock:
+        _pending.add(fut)
+
+    def _done(f):
+        with _pending_lock:
+            _pending.discard(f)
+        if not f.cancelled() and f.exception() is not None:
+            print(f"[WARN] MP3 tagging failed: {f.exception()}")
+    fut.add_done_callback(_done)
+
+
+def wait_for_pending(timeout: Optional[float] = None):
+    """Block until all submitted tagging jobs have finished (call before exiting)."""
+    with _pending_lock:
+        futures = list(_pending)
+    if futures:
+        wait(futures, timeout=timeout)
+
+
+# --- yt-dlp postprocessor class ---
+class GeminiID3PostProcessor(PostProcessor):
+    """Custom yt-dlp postprocessor to retag MP3 using Gemini API.
+
+    Tagging is handed to the background pipeline so the download thread moves on at once;
+    call wait_for_pending() before relying on the tags being written.
+    """
+
+    def run(self, info):
+        file_path = info.get("filepath") or info.get("requested_downloads")[0]["filepath"]
+
+        if not file_path.lower().endswith(".mp3"):
+            return [], info  # Only process MP3s
 
+        _track(pipeline.submit(file_path, dict(info), self.to_screen))
         return [], info
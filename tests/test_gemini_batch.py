@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("TAGGER_CACHE", "0")
+
+pytest.importorskip("google.genai")
+tagger = pytest.importorskip("yt_dlp_gemini_tagger")
+
+
+class _Reached(Exception):
+    """Raised by the fake transport once a request has been fully built."""
+
+
+def test_batch_request_reaches_client(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    tagger.get_client.cache_clear()
+    client = tagger.get_client()
+    sent = []
+
+    def fake_request(http_method, path, request_dict, *args, **kwargs):
+        sent.append((path, request_dict))
+        raise _Reached()
+
+    monkeypatch.setattr(client._api_client, "request", fake_request)
+
+    # schema conversion happens before the transport; a ValueError here would
+    # mean the batch silently falls back to one request per file
+    with pytest.raises(_Reached):
+        tagger.generate_tags_batch(["Artist - First Song.mp3", "Artist - Second Song.mp3"])
+
+    generate = [body for path, body in sent if "generateContent" in path]
+    assert len(generate) == 1
+    assert "First Song" in str(generate[0]) and "Second Song" in str(generate[0])
+    tagger.get_client.cache_clear()
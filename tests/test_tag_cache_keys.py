@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("TAGGER_CACHE", "0")
+
+tagger = pytest.importorskip("yt_dlp_gemini_tagger")
+
+
+@pytest.mark.parametrize("title, filename", [
+    # filenames as prepare_filename() builds them with restrictfilenames and "NNN - " outtmpl
+    ("Artist - Song (Official Video)", "001 - Artist_-_Song_Official_Video.mp3"),
+    ("Artist - Song [Lyrics] HD", "017 - Artist_-_Song_Lyrics_HD.mp3"),
+    ("Artist - Song (Official Music Video)", "120 - Artist_-_Song_Official_Music_Video.mp3"),
+    ("Artist - Song (Remix) [2021-05-04]", "003 - Artist_-_Song_Remix_2021-05-04.mp3"),
+])
+def test_title_and_generated_filename_share_a_key(title, filename):
+    from_title = tagger.normalize_filename(tagger.cache_name_for({"title": title}, filename))
+    from_file = tagger.normalize_filename(tagger.cache_name_for({}, filename))
+    assert from_title == from_file
+
+
+def test_playlist_index_is_not_part_of_the_key():
+    first = tagger.cache_name_for({}, "001 - Artist_-_Song.mp3")
+    moved = tagger.cache_name_for({}, "042 - Artist_-_Song.mp3")
+    assert tagger.TagCache.key_for(first) == tagger.TagCache.key_for(moved)
+
+
+def test_noise_variants_collapse():
+    assert tagger.normalize_filename("Artist - Song (Official Video)") == "artist song"
+    assert tagger.normalize_filename("Artist_-_Song_Lyrics_HD.mp3") == "artist song"
+
+
+def test_recording_variants_stay_distinct():
+    plain = tagger.normalize_filename("Artist - Song")
+    assert tagger.normalize_filename("Artist - Song (Remix)") != plain
+    assert tagger.normalize_filename("Artist - Song (Live at Wembley)") != plain
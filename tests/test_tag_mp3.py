@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("TAGGER_CACHE", "0")
+
+tagger = pytest.importorskip("yt_dlp_gemini_tagger")
+from mutagen.id3 import ID3  # noqa: E402  (present once the tagger imported)
+
+
+def test_saved_tag_is_strict_v23(tmp_path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"\x00" * 2048)  # tag_mp3 only touches the ID3 header
+
+    tags = tagger.MP3Tags(title="Song", artist="Artist", year="2021-05-04", original_date="1970-01-01")
+    tagger.tag_mp3(str(path), tags)
+
+    assert path.read_bytes()[:4] == b"ID3\x03"
+    # translate=False: read the frames as stored, without mutagen's upgrade to v2.4
+    raw = ID3(str(path), translate=False)
+    assert raw.version[:2] == (2, 3)
+    assert raw["TYER"].text == ["2021"]
+    assert raw["TDAT"].text == ["0405"]  # DDMM
+    assert "TORY" in raw
+    assert "TDRC" not in raw and "TDOR" not in raw